@@ -2,7 +2,12 @@ import streamlit as st
 import joblib
 import pandas as pd
 import numpy as np
-import random
+import base64
+import warnings
+
+# The model was fitted on a named-column DataFrame; predicting on plain NumPy
+# arrays is intentional (faster), so silence sklearn's feature-name warning.
+warnings.filterwarnings('ignore', message='X does not have valid feature names')
 
 # --- COLOR PALETTE ---
 ACCENT_GREEN = '#4CAF50'
@@ -10,6 +15,10 @@ ACCENT_ORANGE = '#FF7F50'
 ACCENT_BLUE = '#1E90FF'
 HIGHLIGHT_COLOR = '#E8F5E9'  # Light green background
 
+# The results page has its charts removed; keep the multi-district
+# comparison lazy so the model only runs for what is actually displayed.
+SHOW_COMPARISON = False
+
 # --- 0. CONFIGURATION AND INITIALIZATION ---
 st.set_page_config(
     layout="wide",
@@ -18,8 +27,8 @@ st.set_page_config(
 )
 
 # --- CUSTOM CSS ---
-st.markdown(
-    """
+# Built once at import; reruns just re-emit the constant.
+_CSS = """
     <style>
         [data-testid="stAppViewBlock"] {
             padding-top: 0rem !important;
@@ -66,9 +75,9 @@ st.markdown(
             font-size: 1.8rem;
         }
     </style>
-    """,
-    unsafe_allow_html=True
-)
+    """
+
+st.markdown(_CSS, unsafe_allow_html=True)
 
 # --- SESSION STATE ---
 if 'page' not in st.session_state:
@@ -77,90 +86,174 @@ if 'results' not in st.session_state:
     st.session_state.results = {}
 
 # --- LOAD MODEL AND FEATURES ---
+class _OnnxModel:
+    """sklearn-style predict() wrapper around an ONNX Runtime session."""
+
+    def __init__(self, path):
+        import onnxruntime as ort
+        self._session = ort.InferenceSession(path, providers=['CPUExecutionProvider'])
+        self._input_name = self._session.get_inputs()[0].name
+
+    def predict(self, X):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        return self._session.run(None, {self._input_name: X})[0].ravel()
+
+
 @st.cache_resource
 def load_assets():
-    """Load model and feature columns."""
-    global rf_model, ALL_COLUMNS
+    """Load model and feature columns plus the lookups derived from them."""
     try:
-        rf_model = joblib.load('final_crop_price_predictor.joblib')
         ALL_COLUMNS = joblib.load('feature_columns.joblib')
-        return rf_model, ALL_COLUMNS
-    except FileNotFoundError:
-        ALL_COLUMNS = ['Year', 'Month', 'Day', 'Grade_Encoded', 'District_Pune', 'Commodity_Wheat']
-        rf_model = None
-        return rf_model, ALL_COLUMNS
+        try:
+            rf_model = _OnnxModel('final_crop_price_predictor.onnx')
+        except Exception:
+            try:
+                # Optional: route RF predict through Intel oneDAL when available.
+                # Must run before the pickled sklearn estimator is loaded.
+                from sklearnex import patch_sklearn
+                patch_sklearn()
+            except ImportError:
+                pass
+            from sklearn import set_config
+            # Inputs are app-constructed float32 arrays, so skip the
+            # per-predict finiteness validation.
+            set_config(assume_finite=True)
+            rf_model = joblib.load('final_crop_price_predictor.joblib')
+            # Batches here are 12-36 rows; a worker pool costs more than it saves.
+            rf_model.n_jobs = 1
+        # Warm the predict path once at load so the first user click
+        # doesn't pay the one-time buffer/session setup cost.
+        rf_model.predict(np.zeros((1, len(ALL_COLUMNS)), dtype=np.float32))
     except Exception:
         ALL_COLUMNS = ['Year', 'Month', 'Day', 'Grade_Encoded', 'District_Pune', 'Commodity_Wheat']
         rf_model = None
-        return rf_model, ALL_COLUMNS
+
+    col_idx = {col: i for i, col in enumerate(ALL_COLUMNS)}
+    districts = [col.split('District_')[1] for col in ALL_COLUMNS if col.startswith('District_')]
+    commodities = [col.split('Commodity_')[1] for col in ALL_COLUMNS if col.startswith('Commodity_')]
+    district_col_idx = {name: col_idx[f'District_{name}'] for name in districts}
+    commodity_col_idx = {name: col_idx[f'Commodity_{name}'] for name in commodities}
+    return (rf_model, ALL_COLUMNS, col_idx, district_col_idx, commodity_col_idx, districts,
+            ['Select District...'] + sorted(districts),
+            ['Select Commodity...'] + sorted(commodities))
 
 
-rf_model, ALL_COLUMNS = load_assets()
+(rf_model, ALL_COLUMNS, COL_IDX, DISTRICT_COL_IDX, COMMODITY_COL_IDX,
+ raw_districts, DISTRICT_OPTIONS, COMMODITY_OPTIONS) = load_assets()
+_ZERO_ROW = np.zeros(len(ALL_COLUMNS), dtype=np.float32)
+# The year slider is bounded (2024-2030), so the monthly date ranges can be built once.
+_DATES = {y: pd.date_range(f'{y}-01-01', periods=12, freq='MS') for y in range(2024, 2031)}
 
-# --- OPTIONS ---
-if 'ALL_COLUMNS' not in locals():
-    ALL_COLUMNS = ['Year', 'Month', 'Day', 'Grade_Encoded', 'District_Pune', 'Commodity_Wheat']
 
-raw_districts = [col.split('District_')[1] for col in ALL_COLUMNS if col.startswith('District_')]
-raw_commodities = [col.split('Commodity_')[1] for col in ALL_COLUMNS if col.startswith('Commodity_')]
+def _month_dates(year):
+    """Month-start dates for the 12-month forecast of `year`."""
+    dates = _DATES.get(year)
+    if dates is None:
+        dates = pd.date_range(f'{year}-01-01', periods=12, freq='MS')
+    return dates
 
-DISTRICT_OPTIONS = ['Select District...'] + sorted(raw_districts)
-COMMODITY_OPTIONS = ['Select Commodity...'] + sorted(raw_commodities)
+
+# --- CACHED IMAGE LOADER ---
+@st.cache_data(show_spinner=False)
+def _load_img_bytes(path):
+    """Read an image once per session; returns None if the file is missing."""
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
 
 
 # --- FORECAST FUNCTIONS ---
+def _build_feature_matrix(districts, commodity, year, grade):
+    """Build the (len(districts)*12, n_features) model input, one 12-month block per district.
+
+    Rows are >99% zeros, but the ONNX session only accepts dense tensors and
+    at this width a whole batch is a few KB, so copying the zero template is
+    cheaper than assembling a sparse matrix.
+    """
+    n = len(districts)
+    X = np.broadcast_to(_ZERO_ROW, (n * 12, len(ALL_COLUMNS))).copy()
+    X[:, COL_IDX['Year']] = year
+    X[:, COL_IDX['Month']] = np.tile(np.arange(1, 13), n)
+    X[:, COL_IDX['Day']] = 1
+    X[:, COL_IDX['Grade_Encoded']] = grade
+    commodity_idx = COMMODITY_COL_IDX.get(commodity)
+    if commodity_idx is not None: X[:, commodity_idx] = 1
+    for i, district in enumerate(districts):
+        district_idx = DISTRICT_COL_IDX.get(district)
+        if district_idx is not None: X[i * 12:(i + 1) * 12, district_idx] = 1
+    return X
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
 def get_monthly_forecast(district, commodity, year, grade):
-    """Generate 12-month forecast."""
-    forecasts = []
+    """Generate 12-month forecast with a single batched model call."""
+    dates = _month_dates(year)
 
     if not rf_model:
+        rng = np.random.default_rng()
         return pd.DataFrame({
-            'Month': range(1, 13),
-            'Price': [random.uniform(3000, 5000) + i * 50 for i in range(12)],
-            'Date': pd.to_datetime([f'{year}-{month}-01' for month in range(1, 13)]),
-            'District': [district] * 12
-        })
-
-    for month in range(1, 13):
-        input_data = pd.Series(0, index=ALL_COLUMNS)
-        input_data['Year'], input_data['Month'], input_data['Day'], input_data['Grade_Encoded'] = year, month, 1, grade
-        district_col_name = f'District_{district}'
-        commodity_col_name = f'Commodity_{commodity}'
-        if district_col_name in ALL_COLUMNS: input_data[district_col_name] = 1
-        if commodity_col_name in ALL_COLUMNS: input_data[commodity_col_name] = 1
-        input_df = pd.DataFrame([input_data])
-        predicted_price = rf_model.predict(input_df)[0]
-        forecasts.append({
-            'Month': month,
-            'Price': predicted_price,
-            'Date': pd.to_datetime(f'{year}-{month}-01'),
+            'Month': np.arange(1, 13, dtype=np.int8),
+            'Price': rng.uniform(3000, 5000, size=12) + np.arange(12) * 50,
+            'Date': dates,
             'District': district
         })
 
-    return pd.DataFrame(forecasts)
+    prices = rf_model.predict(_build_feature_matrix([district], commodity, year, grade))
 
+    return pd.DataFrame({
+        'Month': np.arange(1, 13, dtype=np.int8),
+        'Price': prices,
+        'Date': dates,
+        'District': district
+    })
 
-def get_comparison_data(commodity, year, grade, main_district, all_districts, base_forecast_df):
-    """Generate comparison data for multiple districts."""
-    comparison_data = []
-    other_districts = [d for d in all_districts if d != main_district]
-    num_to_sample = min(2, len(other_districts))
-    comp_districts = random.sample(other_districts, num_to_sample)
-    comp_districts.append(main_district)
 
-    for district in comp_districts:
-        if district == main_district:
-            df = base_forecast_df.copy()
-        else:
-            df = get_monthly_forecast(district, commodity, year, grade)
-            if rf_model and df['Price'].iloc[0] == base_forecast_df['Price'].iloc[0]:
-                df['Price'] = df['Price'] + random.uniform(-100, 100)
-        df['District'] = district
-        comparison_data.append(df)
+@st.cache_data(show_spinner=False, max_entries=256)
+def get_comparison_data(commodity, year, grade, main_district, all_districts):
+    """Generate comparison data for multiple districts with one batched model call.
 
-    combined_df = pd.concat(comparison_data)
-    combined_df['Price'] = combined_df['Price'].round(0).astype(int)
-    return combined_df
+    The RNG is seeded from the arguments so the sampled districts (and any
+    tie-break jitter) are stable across reruns, which also makes the result
+    safe to memoize.
+    """
+    base_forecast_df = get_monthly_forecast(main_district, commodity, year, grade)
+    if len(all_districts) <= 1:
+        df = base_forecast_df.copy()
+        df['Price'] = np.rint(df['Price']).astype(np.int32)
+        return df
+
+    rng = np.random.default_rng(abs(hash((commodity, year, grade, main_district))) % (2 ** 32))
+    other_districts = [d for d in all_districts if d != main_district]
+    num_to_sample = min(2, len(other_districts))
+    comp_districts = rng.choice(other_districts, size=num_to_sample, replace=False).tolist() if num_to_sample else []
+
+    dates = _month_dates(year)
+    price_rows = []
+    if rf_model and comp_districts:
+        n = len(comp_districts)
+        X = _build_feature_matrix(comp_districts, commodity, year, grade)
+        prices = rf_model.predict(X).reshape(n, 12)
+        base_first_price = base_forecast_df['Price'].iloc[0]
+        for i in range(n):
+            if prices[i, 0] == base_first_price:
+                prices[i] += rng.uniform(-100, 100, size=12)
+        price_rows = list(prices)
+    else:
+        for district in comp_districts:
+            price_rows.append(get_monthly_forecast(district, commodity, year, grade)['Price'].to_numpy())
+
+    price_rows.append(base_forecast_df['Price'].to_numpy())
+    districts = comp_districts + [main_district]
+    prices_flat = np.concatenate(price_rows)
+
+    return pd.DataFrame({
+        'Month': np.tile(np.arange(1, 13), len(districts)),
+        'Price': np.rint(prices_flat).astype(np.int32),
+        'Date': np.tile(dates, len(districts)),
+        'District': pd.Categorical(np.repeat(districts, 12))
+    })
 
 
 # --- NAVBAR ---
@@ -209,13 +302,15 @@ def show_welcome_screen():
     img_col, text_col = st.columns([1.5, 3])
     with img_col:
         st.markdown('<div class="stacked-images-container">', unsafe_allow_html=True)
-        try:
-            st.image("crop_page1.jpg", use_container_width=True, caption="Plan based on data insights.")
-        except:
+        img = _load_img_bytes("crop_page1.jpg")
+        if img:
+            st.image(img, use_container_width=True, caption="Plan based on data insights.")
+        else:
             st.image("https://placehold.co/400x200/8bc34a/ffffff?text=Farming+Strategy", use_container_width=True)
-        try:
-            st.image("crop1.jpeg", use_container_width=True, caption="Maximize your profits.")
-        except:
+        img = _load_img_bytes("crop1.jpeg")
+        if img:
+            st.image(img, use_container_width=True, caption="Maximize your profits.")
+        else:
             st.image("https://placehold.co/400x200/4CAF50/ffffff?text=Data+Overview", use_container_width=True)
         st.markdown('</div>', unsafe_allow_html=True)
 
@@ -248,13 +343,15 @@ def show_prediction_dashboard():
     with dash_col_img:
         st.markdown("### Focus on Inputs")
         st.markdown('<div class="stacked-images-container">', unsafe_allow_html=True)
-        try:
-            st.image("crop2.jpg", use_container_width=True, caption="Select your specific parameters.")
-        except:
+        img = _load_img_bytes("crop2.jpg")
+        if img:
+            st.image(img, use_container_width=True, caption="Select your specific parameters.")
+        else:
             st.image("https://placehold.co/400x200/9ccc65/ffffff?text=Input+Parameters", use_container_width=True)
-        try:
-            st.image("crop_page2.jpg", use_container_width=True, caption="Data-driven analysis.")
-        except:
+        img = _load_img_bytes("crop_page2.jpg")
+        if img:
+            st.image(img, use_container_width=True, caption="Data-driven analysis.")
+        else:
             st.image("https://placehold.co/400x200/1E90FF/ffffff?text=Data+Driven+Insights", use_container_width=True)
         st.markdown('</div>', unsafe_allow_html=True)
         st.markdown("***Select your crop, market, and month for the most accurate forecast.***")
@@ -295,20 +392,14 @@ def show_prediction_dashboard():
             st.stop()
 
         with st.spinner(f'Calculating 12-month forecast for {selected_commodity} in {selected_district}...'):
-            input_data = pd.Series(0, index=ALL_COLUMNS)
-            input_data['Year'], input_data['Month'], input_data['Day'], input_data['Grade_Encoded'] = selected_year, selected_month, 1, grade_encoded
-            district_col_name = f'District_{selected_district}'
-            commodity_col_name = f'Commodity_{selected_commodity}'
-            if district_col_name in ALL_COLUMNS: input_data[district_col_name] = 1
-            if commodity_col_name in ALL_COLUMNS: input_data[commodity_col_name] = 1
-            predicted_price_specific = rf_model.predict(pd.DataFrame([input_data]))[0]
             forecast_df = get_monthly_forecast(selected_district, selected_commodity, selected_year, grade_encoded)
-            comparison_df = get_comparison_data(selected_commodity, selected_year, grade_encoded, selected_district, raw_districts, forecast_df)
+            predicted_price_specific = forecast_df['Price'].iat[selected_month - 1]
+            if SHOW_COMPARISON:
+                # Warm the comparison cache for the results page.
+                get_comparison_data(selected_commodity, selected_year, grade_encoded, selected_district, raw_districts)
 
         st.session_state.results = {
             'price': predicted_price_specific,
-            'forecast_df': forecast_df,
-            'comparison_df': comparison_df,
             'district': selected_district,
             'commodity': selected_commodity,
             'year': selected_year,
@@ -374,8 +465,14 @@ def show_results_screen():
 
     st.markdown("---")
 
-    st.subheader("📍 District Price Comparison (Chart Removed)")
-    st.info("Comparison chart is disabled. Forecast results are still computed for multiple districts for analysis.")
+    if SHOW_COMPARISON:
+        st.subheader("📍 District Price Comparison")
+        comparison_df = get_comparison_data(
+            results['commodity'], results['year'], results['grade'], results['district'], raw_districts)
+        st.dataframe(comparison_df, use_container_width=True)
+    else:
+        st.subheader("📍 District Price Comparison (Chart Removed)")
+        st.info("Comparison chart is disabled, so district comparisons are not computed.")
 
     st.markdown("---")
 
@@ -391,20 +488,28 @@ def show_results_screen():
     )
 
     st.markdown("#### Future-Proof Your Agriculture 🚀")
-    try:
-        st.image("crop_last.jpg", use_container_width=True, caption="Informed decisions lead to higher profit.")
-    except:
+    img = _load_img_bytes("crop_last.jpg")
+    if img:
+        st.image(img, use_container_width=True, caption="Informed decisions lead to higher profit.")
+    else:
         st.image("https://placehold.co/800x400/9ccc65/ffffff?text=Informed+Decisions", use_container_width=True)
 
 
 # --- MAIN APP RUNNER ---
-try:
-    st.markdown(
-        f"<img src='top.jpeg' class='header-image' alt='App Header Image'>",
-        unsafe_allow_html=True
-    )
-except:
-    pass
+@st.cache_data(show_spinner=False)
+def _header_image_html(path):
+    """Inline the header image as base64; a relative <img src> would 404 in the browser."""
+    try:
+        with open(path, 'rb') as f:
+            data = base64.b64encode(f.read()).decode()
+        return f"<img src='data:image/jpeg;base64,{data}' class='header-image' alt='App Header Image'>"
+    except OSError:
+        return None
+
+
+header_html = _header_image_html('top.jpeg')
+if header_html:
+    st.markdown(header_html, unsafe_allow_html=True)
 
 if st.session_state.page == 'welcome':
     show_welcome_screen()
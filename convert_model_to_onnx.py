@@ -0,0 +1,34 @@
+"""One-time export of the trained RandomForest to ONNX.
+
+Run this after (re)training to regenerate final_crop_price_predictor.onnx,
+which the app prefers over the joblib pickle because ONNX Runtime's compiled
+tree-ensemble kernel predicts small batches far faster than sklearn.
+"""
+import joblib
+import numpy as np
+from skl2onnx import convert_sklearn
+from skl2onnx.common.data_types import FloatTensorType
+
+rf_model = joblib.load('final_crop_price_predictor.joblib')
+ALL_COLUMNS = joblib.load('feature_columns.joblib')
+
+onx = convert_sklearn(
+    rf_model,
+    initial_types=[('X', FloatTensorType([None, len(ALL_COLUMNS)]))]
+)
+
+with open('final_crop_price_predictor.onnx', 'wb') as f:
+    f.write(onx.SerializeToString())
+
+# Sanity check: the ONNX session should reproduce sklearn's predictions
+# up to float32 rounding.
+import onnxruntime as ort
+
+columns = list(ALL_COLUMNS)
+sess = ort.InferenceSession('final_crop_price_predictor.onnx', providers=['CPUExecutionProvider'])
+X = np.zeros((12, len(columns)), dtype=np.float32)
+X[:, columns.index('Year')] = 2025
+X[:, columns.index('Month')] = np.arange(1, 13)
+skl = rf_model.predict(X)
+onnx = sess.run(None, {'X': X})[0].ravel()
+print('max abs diff sklearn vs onnx:', np.max(np.abs(skl - onnx)))